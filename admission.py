@@ -0,0 +1,197 @@
+"""Admission control for the write endpoints.
+
+Every write is a full load+rewrite of pastes.json, so under a burst they are
+turned away early instead of piling up:
+
+- a bounded pending-write queue per process (503 when full)
+- per-client token buckets kept in SQLite so all workers share them (429)
+
+Both rejections carry a Retry-After value. The queue is checked first and
+entirely in memory, so a saturated worker rejects without touching SQLite.
+Rejections are counted in memory and flushed into the same SQLite file on the
+next rate check or metrics read, so /api/metrics reports totals across workers.
+"""
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Configuration
+WRITE_QUEUE_DEPTH = int(os.environ.get("PASTE_WRITE_QUEUE_DEPTH", 16))
+WRITE_RATE = float(os.environ.get("PASTE_WRITE_RATE", 1.0))  # tokens per second
+WRITE_BURST = float(os.environ.get("PASTE_WRITE_BURST", 10))
+QUEUE_FULL_RETRY_AFTER = 1
+# a bucket that has been full this long is dropped; a missing row means full
+BUCKET_IDLE_SECONDS = 600
+PRUNE_INTERVAL = 60
+
+
+class WriteRejected(Exception):
+    def __init__(self, status: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class TokenBucketStore:
+    """Per-client token buckets shared across worker processes."""
+
+    def __init__(self, db_path: str, rate: float, burst: float):
+        self.db_path = db_path
+        self.rate = rate
+        self.burst = burst
+        self._last_prune = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters "
+                "(name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    def _connect(self):
+        # one short-lived connection per call: sqlite connections are not thread-safe
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    def take(self, client: str) -> float:
+        """Take one token for client. Returns 0 on success, else seconds until one is available."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE client = ?", (client,)
+            ).fetchone()
+            if row is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, row[0] + (now - row[1]) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (client, tokens, updated) VALUES (?, ?, ?)",
+                (client, tokens, now),
+            )
+            if now - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(conn, now)
+                self._last_prune = now
+            conn.execute("COMMIT")
+            return wait
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # never block writes because the limiter store is unavailable
+            return 0.0
+        finally:
+            conn.close()
+
+    def _prune(self, conn, now: float):
+        # the bucket refilled to burst at updated + (burst - tokens) / rate
+        conn.execute(
+            "DELETE FROM buckets WHERE updated + (? - tokens) / ? <= ?",
+            (self.burst, self.rate, now - BUCKET_IDLE_SECONDS),
+        )
+
+    def prune(self):
+        try:
+            with self._connect() as conn:
+                self._prune(conn, time.time())
+        except sqlite3.Error:
+            pass
+
+    def add_counters(self, deltas: dict) -> bool:
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(deltas.items()),
+                )
+            return True
+        except sqlite3.Error:
+            return False
+
+    def counters(self) -> dict:
+        try:
+            with self._connect() as conn:
+                return dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        except sqlite3.Error:
+            return {}
+
+
+class WriteAdmission:
+    def __init__(self, buckets: TokenBucketStore, depth: int = WRITE_QUEUE_DEPTH):
+        self.buckets = buckets
+        self.depth = depth
+        self._pending = 0
+        self._unflushed = {}
+        self._lock = threading.Lock()
+
+    def _count_rejection(self, name: str):
+        with self._lock:
+            self._unflushed[name] = self._unflushed.get(name, 0) + 1
+
+    def flush_counters(self):
+        with self._lock:
+            deltas, self._unflushed = self._unflushed, {}
+        if deltas and not self.buckets.add_counters(deltas):
+            # keep them for the next flush
+            with self._lock:
+                for name, value in deltas.items():
+                    self._unflushed[name] = self._unflushed.get(name, 0) + value
+
+    def enter(self):
+        """Take a queue slot. In memory only, safe to call from an event loop."""
+        with self._lock:
+            full = self._pending >= self.depth
+            if not full:
+                self._pending += 1
+        if full:
+            self._count_rejection("queue_full")
+            raise WriteRejected(503, "Server busy, try again shortly", QUEUE_FULL_RETRY_AFTER)
+
+    def leave(self):
+        with self._lock:
+            self._pending -= 1
+
+    def check_rate(self, client: str):
+        """Take a token for client. Blocking: hits the shared SQLite store."""
+        wait = self.buckets.take(client)
+        if wait > 0:
+            self._count_rejection("rate_limited")
+        self.flush_counters()
+        if wait > 0:
+            raise WriteRejected(429, "Too many writes, slow down", int(wait) + 1)
+
+    @contextmanager
+    def admitted(self, client: str):
+        self.enter()
+        try:
+            self.check_rate(client)
+            yield
+        finally:
+            self.leave()
+
+    def metrics(self) -> dict:
+        self.flush_counters()
+        counters = self.buckets.counters()
+        return {
+            "write_queue": {
+                "pid": os.getpid(),
+                "pending": self._pending,
+                "max_depth": self.depth,
+            },
+            "rejected": {
+                "rate_limited": counters.get("rate_limited", 0),
+                "queue_full": counters.get("queue_full", 0),
+            },
+        }
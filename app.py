@@ -16,18 +16,42 @@ from flask import (
     send_from_directory,
 )
 
+from assets import ASSET_DIR, load_manifest, resolve_asset_url, asset_file
+from admission import TokenBucketStore, WriteAdmission, WriteRejected, WRITE_RATE, WRITE_BURST
+from replication import (
+    ChangeJournal,
+    StoreLock,
+    Follower,
+    PRIMARY_URL,
+    CHANGES_PAGE_SIZE,
+    WRITE_ENDPOINTS,
+)
+
 app = Flask(__name__, static_folder="static", template_folder="templates")
 app.secret_key = os.urandom(32)
 
 # Configuration
-PASTE_STORAGE_DIR = os.path.join(os.path.dirname(__file__), "pastes")
+PASTE_STORAGE_DIR = os.environ.get(
+    "PASTE_STORAGE_DIR", os.path.join(os.path.dirname(__file__), "pastes")
+)
 PASTE_FILE = os.path.join(PASTE_STORAGE_DIR, "pastes.json")
 MAX_PASTE_SIZE = 50000
 MAX_PASTES_PER_PAGE = 20
-PORT = 5002
+ADMISSION_DB = os.path.join(PASTE_STORAGE_DIR, "admission.db")
+JOURNAL_DB = os.path.join(PASTE_STORAGE_DIR, "changes.db")
+WRITE_LOCK_FILE = os.path.join(PASTE_STORAGE_DIR, ".write.lock")
+FOLLOWER_CURSOR_FILE = os.path.join(PASTE_STORAGE_DIR, "follower_cursor.json")
+PORT = int(os.environ.get("PASTE_PORT", 5002))
 
 os.makedirs(PASTE_STORAGE_DIR, exist_ok=True)
 
+asset_manifest = load_manifest()
+admission = WriteAdmission(TokenBucketStore(ADMISSION_DB, WRITE_RATE, WRITE_BURST))
+journal = ChangeJournal(JOURNAL_DB)
+
+# load -> modify -> save -> journal must not interleave, across threads and workers
+store_lock = StoreLock(WRITE_LOCK_FILE)
+
 
 def init_storage():
     if not os.path.exists(PASTE_FILE):
@@ -73,19 +97,22 @@ def validate_paste(content: str):
     return True, ""
 
 
-# Serve JS from /scripts/app.js (your preferred structure)
-@app.route("/scripts/<path:filename>")
-def scripts(filename):
-    return send_from_directory("scripts", filename)
+def build_paste(content: str, title=None, language=None) -> dict:
+    return {
+        "id": generate_paste_id(content),
+        "title": title,
+        "content": content,
+        "language": language,
+        "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "size": len(content),
+    }
 
 
-@app.route("/", methods=["GET"])
-def index():
-    init_storage()
+def find_paste(paste_id):
+    return next((p for p in load_pastes() if p.get("id") == paste_id), None)
 
-    page = int(request.args.get("page", 1))
-    pastes = load_pastes()
 
+def paginate(pastes, page: int):
     total_pastes = len(pastes)
     total_pages = (total_pastes + MAX_PASTES_PER_PAGE - 1) // MAX_PASTES_PER_PAGE
 
@@ -99,7 +126,116 @@ def index():
 
     start_idx = (page - 1) * MAX_PASTES_PER_PAGE
     end_idx = start_idx + MAX_PASTES_PER_PAGE
-    page_pastes = pastes[start_idx:end_idx]
+    return pastes[start_idx:end_idx], page, total_pages
+
+
+# Write paths below expect the caller to hold store_lock.
+
+def commit_change(event, pastes, previous):
+    """Save pastes and journal event together: both land or neither does."""
+    saved = False
+
+    def save():
+        nonlocal saved
+        save_pastes(pastes)
+        saved = True
+
+    try:
+        journal.append(event, apply=save)
+    except BaseException:
+        if saved:
+            # pastes.json was replaced but the journal commit failed
+            save_pastes(previous)
+        raise
+
+
+def add_paste(paste):
+    pastes = load_pastes()
+    commit_change({"op": "create", "paste": paste}, [paste] + pastes, pastes)
+
+
+def remove_paste(paste_id) -> bool:
+    pastes = load_pastes()
+    remaining = [p for p in pastes if p.get("id") != paste_id]
+    if len(remaining) == len(pastes):
+        return False
+    commit_change({"op": "delete", "id": paste_id}, remaining, pastes)
+    return True
+
+
+def snapshot():
+    return {"cursor": journal.head(), "pastes": load_pastes()}
+
+
+def read_changes(since: int, limit: int):
+    return journal.feed(since, min(limit, CHANGES_PAGE_SIZE))
+
+
+follower = (
+    Follower(PRIMARY_URL, FOLLOWER_CURSOR_FILE, load_pastes, save_pastes) if PRIMARY_URL else None
+)
+
+
+def replication_metrics():
+    return follower.metrics() if follower else journal.metrics()
+
+
+def forwarded_write_url(endpoint, full_path):
+    """Primary URL for a write that reached a follower, else None."""
+    if follower and endpoint in WRITE_ENDPOINTS:
+        return PRIMARY_URL + full_path.rstrip("?")
+    return None
+
+
+@app.before_request
+def forward_writes_to_primary():
+    # a follower only serves reads; 307 keeps the method and body for the primary
+    url = forwarded_write_url(request.endpoint, request.full_path)
+    if url:
+        return redirect(url, code=307)
+
+
+@app.errorhandler(WriteRejected)
+def write_rejected(err):
+    headers = {"Retry-After": str(err.retry_after)}
+    if request.path.startswith("/api/"):
+        return jsonify({"error": err.message}), err.status, headers
+    # browser form routes: same status, but a page a person can read
+    body = render_template(
+        "error.html", title="Try again shortly", message=err.message, retry_after=err.retry_after
+    )
+    return body, err.status, headers
+
+
+@app.template_global()
+def asset_url(name):
+    return resolve_asset_url(asset_manifest, name, url_for)
+
+
+# Fingerprinted assets from `python assets.py`; the name changes with the content
+@app.route("/assets/<path:filename>")
+def assets(filename):
+    found = asset_file(asset_manifest, filename, request.headers.get("Accept-Encoding", ""))
+    if found is None:
+        abort(404)
+    served, mimetype, headers = found
+    response = send_from_directory(ASSET_DIR, served, mimetype=mimetype)
+    response.headers.update(headers)
+    return response
+
+
+# Serve JS from /scripts/app.js (your preferred structure)
+@app.route("/scripts/<path:filename>")
+def scripts(filename):
+    return send_from_directory("scripts", filename)
+
+
+@app.route("/", methods=["GET"])
+def index():
+    init_storage()
+
+    page = int(request.args.get("page", 1))
+    page_pastes, page, total_pages = paginate(load_pastes(), page)
 
     message = request.args.get("message", "")
     message_type = request.args.get("type", "success")
@@ -125,30 +261,23 @@ def create_paste():
     if not is_valid:
         return redirect(url_for("index", message=error_msg, type="error"))
 
-    paste_id = generate_paste_id(content)
-
-    paste = {
-        "id": paste_id,
-        "title": title if title else None,
-        "content": content,
-        "language": language if language != "auto" else detect_language(content),
-        "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "size": len(content),
-    }
+    paste = build_paste(
+        content,
+        title=title if title else None,
+        language=language if language != "auto" else detect_language(content),
+    )
 
-    pastes = load_pastes()
-    pastes.insert(0, paste)
-    save_pastes(pastes)
+    with admission.admitted(request.remote_addr or "unknown"), store_lock:
+        add_paste(paste)
 
     return redirect(
-        url_for("index", message=f"Paste created successfully! ID: {paste_id}", type="success")
+        url_for("index", message=f"Paste created successfully! ID: {paste['id']}", type="success")
     )
 
 
 @app.route("/paste/<paste_id>", methods=["GET"])
 def view_paste(paste_id):
-    pastes = load_pastes()
-    paste = next((p for p in pastes if p.get("id") == paste_id), None)
+    paste = find_paste(paste_id)
     if not paste:
         abort(404)
 
@@ -162,8 +291,7 @@ def view_paste(paste_id):
 
 @app.route("/raw/<paste_id>", methods=["GET"])
 def raw_paste(paste_id):
-    pastes = load_pastes()
-    paste = next((p for p in pastes if p.get("id") == paste_id), None)
+    paste = find_paste(paste_id)
     if not paste:
         abort(404)
     return Response(paste.get("content", ""), mimetype="text/plain; charset=utf-8")
@@ -171,12 +299,10 @@ def raw_paste(paste_id):
 
 @app.route("/delete/<paste_id>", methods=["GET"])
 def delete_paste(paste_id):
-    pastes = load_pastes()
-    original_count = len(pastes)
-    pastes = [p for p in pastes if p.get("id") != paste_id]
+    with admission.admitted(request.remote_addr or "unknown"), store_lock:
+        deleted = remove_paste(paste_id)
 
-    if len(pastes) < original_count:
-        save_pastes(pastes)
+    if deleted:
         return redirect(url_for("index", message="Paste deleted successfully!", type="success"))
     return redirect(url_for("index", message="Paste not found!", type="error"))
 
@@ -195,24 +321,39 @@ def api_create_paste():
     if not is_valid:
         return jsonify({"error": error_msg}), 400
 
-    paste_id = generate_paste_id(content)
-    paste = {
-        "id": paste_id,
-        "title": data.get("title"),
-        "content": content,
-        "language": data.get("language", "auto"),
-        "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "size": len(content),
-    }
+    paste = build_paste(content, title=data.get("title"), language=data.get("language", "auto"))
+
+    with admission.admitted(request.remote_addr or "unknown"), store_lock:
+        add_paste(paste)
+
+    return jsonify({"id": paste["id"], "paste": paste})
+
+
+@app.route("/api/changes", methods=["GET"])
+def api_changes():
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", CHANGES_PAGE_SIZE, type=int)
+    return jsonify(read_changes(since, limit))
+
+
+@app.route("/api/snapshot", methods=["GET"])
+def api_snapshot():
+    # taken under the write lock so the cursor matches the pastes exactly
+    with store_lock:
+        return jsonify(snapshot())
+
+
+@app.route("/api/metrics", methods=["GET"])
+def api_metrics():
+    return jsonify(dict(admission.metrics(), replication=replication_metrics()))
 
-    pastes = load_pastes()
-    pastes.insert(0, paste)
-    save_pastes(pastes)
 
-    return jsonify({"id": paste_id, "paste": paste})
+if follower:
+    follower.start()
 
 
 if __name__ == "__main__":
     print("... launching private texts")
     print(f"... at http://192.168.1.106:{PORT}")
-    app.run(host="0.0.0.0", port=PORT, debug=True)
+    # the reloader's watcher process would take the follower lock from the server
+    app.run(host="0.0.0.0", port=PORT, debug=True, use_reloader=follower is None)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""ASGI serving mode for the paste service.
+
+Same routes and templates as app.py, served by Quart so one process can hold
+many slow clients without a thread per connection. Storage reads and writes
+run on a small bounded thread pool instead of the event loop, and /raw
+responses are streamed in chunks. Route logic lives in plain helpers in
+app.py; this module only holds the async glue.
+
+Run with any ASGI server, e.g.:
+
+    hypercorn asgi:app --bind 0.0.0.0:5002
+    uvicorn asgi:app --port 5002
+"""
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import (
+    Quart,
+    request,
+    redirect,
+    url_for,
+    render_template,
+    abort,
+    jsonify,
+    Response,
+    send_from_directory,
+)
+
+from admission import WriteRejected
+from replication import CHANGES_PAGE_SIZE
+from assets import ASSET_DIR, resolve_asset_url, asset_file
+from app import (
+    PORT,
+    admission,
+    asset_manifest,
+    store_lock,
+    replication_metrics,
+    forwarded_write_url,
+    init_storage,
+    load_pastes,
+    find_paste,
+    paginate,
+    build_paste,
+    add_paste,
+    remove_paste,
+    snapshot,
+    read_changes,
+    detect_language,
+    validate_paste,
+)
+
+app = Quart(__name__, static_folder="static", template_folder="templates")
+app.secret_key = os.urandom(32)
+
+# Configuration
+STORAGE_WORKERS = int(os.environ.get("PASTE_STORAGE_WORKERS", 4))
+LIMITER_WORKERS = 2
+RAW_CHUNK_SIZE = 64 * 1024
+
+_storage_pool = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="paste-storage")
+# rate checks get their own threads so a write burst never queues reads behind them
+_limiter_pool = ThreadPoolExecutor(max_workers=LIMITER_WORKERS, thread_name_prefix="paste-limiter")
+
+# queues this process's writers without tying up executor threads;
+# store_lock then serializes against other worker processes
+_write_lock = asyncio.Lock()
+
+
+async def run_storage(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_storage_pool, func, *args)
+
+
+async def run_limiter(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_limiter_pool, func, *args)
+
+
+@asynccontextmanager
+async def store_locked():
+    async with _write_lock:
+        await run_storage(store_lock.acquire)
+        try:
+            yield
+        finally:
+            await run_storage(store_lock.release)
+
+
+@asynccontextmanager
+async def admitted_write():
+    # queue slot is in memory; a full queue is rejected before touching sqlite
+    admission.enter()
+    try:
+        await run_limiter(admission.check_rate, request.remote_addr or "unknown")
+        async with store_locked():
+            yield
+    finally:
+        admission.leave()
+
+
+async def stream_text(text: str):
+    data = text.encode("utf-8")
+    for start in range(0, len(data), RAW_CHUNK_SIZE):
+        yield data[start:start + RAW_CHUNK_SIZE]
+        # let other clients run between chunks of a large paste
+        await asyncio.sleep(0)
+
+
+@app.after_serving
+async def shutdown_storage_pool():
+    _storage_pool.shutdown(wait=True)
+    _limiter_pool.shutdown(wait=True)
+
+
+@app.before_request
+async def forward_writes_to_primary():
+    # a follower only serves reads; 307 keeps the method and body for the primary
+    url = forwarded_write_url(request.endpoint, request.full_path)
+    if url:
+        return redirect(url, code=307)
+
+
+@app.errorhandler(WriteRejected)
+async def write_rejected(err):
+    headers = {"Retry-After": str(err.retry_after)}
+    if request.path.startswith("/api/"):
+        return jsonify({"error": err.message}), err.status, headers
+    # browser form routes: same status, but a page a person can read
+    body = await render_template(
+        "error.html", title="Try again shortly", message=err.message, retry_after=err.retry_after
+    )
+    return body, err.status, headers
+
+
+@app.template_global()
+def asset_url(name):
+    return resolve_asset_url(asset_manifest, name, url_for)
+
+
+@app.route("/assets/<path:filename>")
+async def assets(filename):
+    found = asset_file(asset_manifest, filename, request.headers.get("Accept-Encoding", ""))
+    if found is None:
+        abort(404)
+    served, mimetype, headers = found
+    response = await send_from_directory(ASSET_DIR, served, mimetype=mimetype)
+    response.headers.update(headers)
+    return response
+
+
+@app.route("/scripts/<path:filename>")
+async def scripts(filename):
+    return await send_from_directory(os.path.join(app.root_path, "scripts"), filename)
+
+
+@app.route("/", methods=["GET"])
+async def index():
+    await run_storage(init_storage)
+
+    page = int(request.args.get("page", 1))
+    page_pastes, page, total_pages = paginate(await run_storage(load_pastes), page)
+
+    message = request.args.get("message", "")
+    message_type = request.args.get("type", "success")
+
+    return await render_template(
+        "index.html",
+        title="Modern Paste Service",
+        pastes=page_pastes,
+        page=page,
+        total_pages=total_pages,
+        message=message,
+        message_type=message_type,
+    )
+
+
+@app.route("/paste", methods=["POST"])
+async def create_paste():
+    form = await request.form
+    content = form.get("content", "")
+    title = form.get("title", "").strip()
+    language = form.get("language", "auto")
+
+    is_valid, error_msg = validate_paste(content)
+    if not is_valid:
+        return redirect(url_for("index", message=error_msg, type="error"))
+
+    paste = build_paste(
+        content,
+        title=title if title else None,
+        language=language if language != "auto" else detect_language(content),
+    )
+
+    async with admitted_write():
+        await run_storage(add_paste, paste)
+
+    return redirect(
+        url_for("index", message=f"Paste created successfully! ID: {paste['id']}", type="success")
+    )
+
+
+@app.route("/paste/<paste_id>", methods=["GET"])
+async def view_paste(paste_id):
+    paste = await run_storage(find_paste, paste_id)
+    if not paste:
+        abort(404)
+
+    return await render_template(
+        "view.html",
+        title=f"Paste {paste_id}",
+        paste_id=paste_id,
+        paste_content=paste.get("content", ""),
+    )
+
+
+@app.route("/raw/<paste_id>", methods=["GET"])
+async def raw_paste(paste_id):
+    paste = await run_storage(find_paste, paste_id)
+    if not paste:
+        abort(404)
+    return Response(stream_text(paste.get("content", "")), mimetype="text/plain; charset=utf-8")
+
+
+@app.route("/delete/<paste_id>", methods=["GET"])
+async def delete_paste(paste_id):
+    async with admitted_write():
+        deleted = await run_storage(remove_paste, paste_id)
+
+    if deleted:
+        return redirect(url_for("index", message="Paste deleted successfully!", type="success"))
+    return redirect(url_for("index", message="Paste not found!", type="error"))
+
+
+@app.route("/api/pastes", methods=["GET"])
+async def api_get_pastes():
+    return jsonify(await run_storage(load_pastes))
+
+
+@app.route("/api/paste", methods=["POST"])
+async def api_create_paste():
+    data = await request.get_json(force=True, silent=True) or {}
+    content = data.get("content", "")
+
+    is_valid, error_msg = validate_paste(content)
+    if not is_valid:
+        return jsonify({"error": error_msg}), 400
+
+    paste = build_paste(content, title=data.get("title"), language=data.get("language", "auto"))
+
+    async with admitted_write():
+        await run_storage(add_paste, paste)
+
+    return jsonify({"id": paste["id"], "paste": paste})
+
+
+@app.route("/api/changes", methods=["GET"])
+async def api_changes():
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", CHANGES_PAGE_SIZE, type=int)
+    return jsonify(await run_storage(read_changes, since, limit))
+
+
+@app.route("/api/snapshot", methods=["GET"])
+async def api_snapshot():
+    # taken under the write lock so the cursor matches the pastes exactly
+    async with store_locked():
+        data = await run_storage(snapshot)
+    return jsonify(data)
+
+
+@app.route("/api/metrics", methods=["GET"])
+async def api_metrics():
+    metrics = await run_limiter(admission.metrics)
+    return jsonify(dict(metrics, replication=replication_metrics()))
+
+
+if __name__ == "__main__":
+    print("... launching private texts (asgi)")
+    print(f"... at http://localhost:{PORT}")
+    app.run(host="0.0.0.0", port=PORT)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Fingerprinted static asset pipeline.
+
+Build step (run after changing any CSS/JS/SVG):
+
+    python assets.py
+
+Copies every asset into static/dist/ under a content-hashed name, writes
+.gz (and .br when the brotli package is installed) next to it, and records
+the mapping in static/dist/manifest.json. Templates call asset_url(name) to
+get the fingerprinted /assets/ URL, which is served with
+Cache-Control: immutable. Without a manifest asset_url falls back to the
+plain /static and /scripts URLs, so the app still works unbuilt.
+
+Files from earlier builds are kept, so servers still holding an old manifest
+and pages already open keep working. Once every server has been restarted on
+the new manifest, remove them with:
+
+    python assets.py --clean
+"""
+import os
+import sys
+import gzip
+import json
+import hashlib
+import mimetypes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
+ASSET_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_FILE = os.path.join(ASSET_DIR, "manifest.json")
+
+ASSET_EXTENSIONS = (".css", ".js", ".svg")
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={ASSET_MAX_AGE}, immutable"
+
+# served encodings, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def find_sources():
+    """Yield (logical name, source path) for every asset.
+
+    Logical names are what templates pass to asset_url: paths under static/
+    as-is (e.g. "resources/copy.svg"), files under scripts/ prefixed with
+    "scripts/" to match the /scripts route.
+    """
+    for root_dir, prefix in ((STATIC_DIR, ""), (SCRIPTS_DIR, "scripts/")):
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            # don't descend into the build output (siblings like dist-old/ are sources)
+            dirnames[:] = sorted(
+                d for d in dirnames if os.path.join(os.path.abspath(dirpath), d) != ASSET_DIR
+            )
+            for filename in sorted(filenames):
+                if not filename.endswith(ASSET_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                rel = os.path.relpath(path, root_dir).replace(os.sep, "/")
+                yield prefix + rel, path
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def write_file(path: str, data: bytes):
+    # same name always means same content, so an existing file is already right
+    if os.path.exists(path):
+        return
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(data)
+    os.replace(temp_file, path)
+
+
+def build():
+    os.makedirs(ASSET_DIR, exist_ok=True)
+
+    manifest = {}
+    for name, path in find_sources():
+        with open(path, "rb") as f:
+            data = f.read()
+
+        hashed = fingerprint(name, data)
+        out = os.path.join(ASSET_DIR, hashed)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+
+        write_file(out, data)
+        write_file(out + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            write_file(out + ".br", brotli.compress(data, quality=11))
+
+        manifest[name] = hashed
+
+    temp_file = MANIFEST_FILE + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_file, MANIFEST_FILE)
+    return manifest
+
+
+def clean():
+    """Delete built files the current manifest no longer references."""
+    keep = {MANIFEST_FILE}
+    for hashed in load_manifest().values():
+        out = os.path.join(ASSET_DIR, hashed)
+        keep.update((out, out + ".gz", out + ".br"))
+
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(ASSET_DIR):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if path not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def resolve_asset_url(manifest, name: str, url_for):
+    hashed = manifest.get(name)
+    if hashed:
+        return url_for("assets", filename=hashed)
+    if name.startswith("scripts/"):
+        return url_for("scripts", filename=name[len("scripts/"):])
+    return url_for("static", filename=name)
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    qvalues = {}
+    for part in (header or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.lower()] = q
+    return qvalues
+
+
+def negotiate_encoding(filename: str, accept_encoding: str):
+    """Pick the precompressed variant of filename the client accepts.
+
+    Highest q-value wins, ties go to the order in ENCODINGS; q=0 means
+    "not acceptable". Returns (file to send, Content-Encoding or None).
+    """
+    qvalues = parse_accept_encoding(accept_encoding)
+    candidates = []
+    for rank, (encoding, suffix) in enumerate(ENCODINGS):
+        q = qvalues.get(encoding, qvalues.get("*", 0.0))
+        if q > 0 and os.path.isfile(os.path.join(ASSET_DIR, filename + suffix)):
+            candidates.append((-q, rank, encoding, suffix))
+    if candidates:
+        _, _, encoding, suffix = min(candidates)
+        return filename + suffix, encoding
+    return filename, None
+
+
+def asset_mimetype(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def asset_file(manifest, filename: str, accept_encoding: str):
+    """What to send for /assets/<filename>: (file under ASSET_DIR, mimetype, headers).
+
+    Only fingerprinted names from the manifest are served, since only those
+    may be cached forever. Anything else, manifest.json included, gets None.
+    """
+    if filename not in manifest.values():
+        return None
+    served, encoding = negotiate_encoding(filename, accept_encoding)
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return served, asset_mimetype(filename), headers
+
+
+if __name__ == "__main__":
+    if "--clean" in sys.argv[1:]:
+        print(f"... removed {clean()} stale files from {os.path.relpath(ASSET_DIR, BASE_DIR)}")
+        sys.exit(0)
+
+    built = build()
+    print(f"... built {len(built)} assets into {os.path.relpath(ASSET_DIR, BASE_DIR)}")
+    if brotli is None:
+        print("... brotli not installed, only .gz variants written")
@@ -3,7 +3,19 @@ import os
 import json
 import hashlib
 import datetime
-from flask import Flask, request, redirect, url_for, render_template_string, abort, jsonify, Response
+from flask import (
+    Flask,
+    request,
+    redirect,
+    url_for,
+    render_template_string,
+    abort,
+    jsonify,
+    Response,
+    send_from_directory,
+)
+
+from assets import ASSET_DIR, load_manifest, resolve_asset_url, asset_file
 
 app = Flask(__name__)
 app.secret_key = os.urandom(32)
@@ -17,6 +29,8 @@ PORT = 5002
 
 os.makedirs(PASTE_STORAGE_DIR, exist_ok=True)
 
+asset_manifest = load_manifest()
+
 
 def init_storage():
     if not os.path.exists(PASTE_FILE):
@@ -62,6 +76,27 @@ def validate_paste(content: str):
     return True, ""
 
 
+@app.template_global()
+def asset_url(name):
+    return resolve_asset_url(asset_manifest, name, url_for)
+
+
+@app.route("/assets/<path:filename>")
+def assets(filename):
+    found = asset_file(asset_manifest, filename, request.headers.get("Accept-Encoding", ""))
+    if found is None:
+        abort(404)
+    served, mimetype, headers = found
+    response = send_from_directory(ASSET_DIR, served, mimetype=mimetype)
+    response.headers.update(headers)
+    return response
+
+
+@app.route("/scripts/<path:filename>")
+def scripts(filename):
+    return send_from_directory("scripts", filename)
+
+
 INDEX_TEMPLATE = r"""
 <!DOCTYPE html>
 <html lang="en">
@@ -69,76 +104,7 @@ INDEX_TEMPLATE = r"""
   <meta charset="UTF-8"/>
   <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
   <title>{{ title }}</title>
-  <style>
-    * { margin:0; padding:0; box-sizing:border-box; }
-    body {
-      font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;
-      color:#333;
-      background: linear-gradient(-45deg, hsla(60, 1%, 37%, 1) 0%, hsla(25, 33%, 17%, 1) 100%);
-      min-height:100vh;
-    }
-    .container { max-width:1200px; margin:0 auto; padding:20px; }
-    .header { text-align:center; color:#EDEDE9; margin-bottom:30px; }
-    .header h1 { font-size:1.5rem; margin-bottom:8px; }
-
-    .alert { padding:12px 16px; border-radius:8px; margin-bottom:16px; }
-    .alert-success { background:#d4edda; border:1px solid #c3e6cb; color:#155724; }
-    .alert-error { background:#f8d7da; border:1px solid #f5c6cb; color:#721c24; }
-
-    .paste-form {
-      background:#fff; border-radius:15px; padding:20px;
-      box-shadow:0 10px 30px rgba(0,0,0,0.2);
-      margin-bottom:24px;
-    }
-    .form-group { margin-bottom:14px; }
-    label { display:block; margin-bottom:6px; font-weight:600; color:#555; }
-    input, textarea, select {
-      width:100%; padding:12px; border:2px solid #e1e5e9; border-radius:8px; font-size:14px;
-    }
-    textarea { min-height:200px; font-family: 'Monaco','Menlo','Ubuntu Mono',monospace; resize:vertical; }
-
-    .btn {
-      background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-      color:#fff; border:none; border-radius:8px; cursor:pointer;
-      padding:10px 18px; font-weight:700; text-decoration:none; display:inline-block;
-    }
-    .btn-sm { padding:6px 12px; font-size:12px; font-weight:700; }
-    .btn-secondary { background: linear-gradient(135deg, #95a5a6 0%, #7f8c8d 100%); }
-    .btn-danger { background: linear-gradient(135deg, #ff6b6b 0%, #ee5a52 100%); }
-
-    .paste-item {
-      background:#fff; border-radius:15px; padding:18px; margin-bottom:16px;
-      box-shadow:0 5px 15px rgba(0,0,0,0.12);
-    }
-    .paste-header { display:flex; justify-content:space-between; gap:10px; align-items:flex-start; }
-    .meta { color:#666; font-size:13px; margin-top:6px; }
-    .actions { display:flex; gap:8px; flex-wrap:wrap; }
-
-    .content {
-      position: relative;              /* IMPORTANT: anchor absolute copy button */
-      margin-top:12px;
-      background:#f8f9fa; border:1px solid #e1e5e9; border-radius:8px;
-      padding:14px;
-      padding-top:44px;                /* give space so button doesn't cover line 1 */
-      font-family:'Monaco','Menlo','Ubuntu Mono',monospace;
-      white-space:pre-wrap;
-      max-height:240px; overflow:auto;
-    }
-
-    .copy-btn {
-      position:absolute; top:10px; right:10px;
-      background: rgba(102, 126, 234, 0.9);
-      color:white; border:none; border-radius:6px;
-      padding:6px 10px; font-weight:800; cursor:pointer;
-    }
-
-    .pagination { display:flex; justify-content:center; gap:10px; margin-top:22px; flex-wrap:wrap; }
-    .pagination a, .pagination span {
-      padding:8px 14px; border:1px solid #ddd; border-radius:6px; text-decoration:none;
-      color:#333; background:#fff;
-    }
-    .pagination .current { background:#667eea; color:#fff; border-color:#667eea; }
-  </style>
+  <link rel="stylesheet" href="{{ asset_url('pasteBin2_index.css') }}">
 </head>
 <body>
   <div class="container">
@@ -234,50 +200,7 @@ INDEX_TEMPLATE = r"""
     {% endif %}
   </div>
 
-  <script>
-    function copyToClipboard(pasteId, btn) {
-      const node = document.getElementById('content-' + pasteId);
-      if (!node) return;
-
-      const clone = node.cloneNode(true);
-      const b = clone.querySelector('button.copy-btn');
-      if (b) b.remove();
-
-      const text = (clone.innerText || clone.textContent || '').trim();
-
-      const show = () => {
-        const old = btn.innerHTML;
-        btn.innerHTML = '✅ Copied!';
-        setTimeout(() => btn.innerHTML = old, 1600);
-      };
-
-      // HTTPS/localhost works reliably; LAN HTTP often blocks it -> fallback below
-      if (navigator.clipboard && window.isSecureContext) {
-        navigator.clipboard.writeText(text).then(show).catch(() => fallbackCopy(text, show));
-      } else {
-        fallbackCopy(text, show);
-      }
-    }
-
-    function fallbackCopy(text, okCb) {
-      const ta = document.createElement('textarea');
-      ta.value = text;
-      ta.setAttribute('readonly', '');
-      ta.style.position = 'fixed';
-      ta.style.left = '-9999px';
-      document.body.appendChild(ta);
-      ta.select();
-      try {
-        const ok = document.execCommand('copy');
-        if (ok) okCb();
-        else alert('Copy failed (browser blocked it).');
-      } catch (e) {
-        alert('Copy failed (browser blocked it).');
-      } finally {
-        document.body.removeChild(ta);
-      }
-    }
-  </script>
+  <script src="{{ asset_url('scripts/pasteBin2.js') }}"></script>
 </body>
 </html>
 """
@@ -291,47 +214,7 @@ VIEW_TEMPLATE = r"""
   <meta charset="UTF-8"/>
   <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
   <title>{{ title }}</title>
-  <style>
-    * { margin:0; padding:0; box-sizing:border-box; }
-    body {
-      font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;
-      background: linear-gradient(-45deg, hsla(60, 1%, 37%, 1) 0%, hsla(25, 33%, 17%, 1) 100%);
-      min-height:100vh; padding:20px;
-    }
-    .wrap { max-width:1100px; margin:0 auto; }
-
-    .topbar {
-      display:flex; justify-content:space-between; align-items:center; gap:10px;
-      margin-bottom:12px; flex-wrap:wrap;
-    }
-    .title { color:#EDEDE9; font-weight:800; font-size:16px; }
-
-    .btn {
-      background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-      color:#fff; border:none; border-radius:8px; cursor:pointer;
-      padding:8px 14px; font-weight:800; text-decoration:none; display:inline-block;
-    }
-    .btn-secondary { background: linear-gradient(135deg, #95a5a6 0%, #7f8c8d 100%); }
-    .btn-danger { background: linear-gradient(135deg, #ff6b6b 0%, #ee5a52 100%); }
-
-    .content {
-      background:#fff; border-radius:14px; padding:18px;
-      padding-top:44px;
-      box-shadow:0 10px 30px rgba(0,0,0,0.25);
-      position:relative;
-      font-family:'Monaco','Menlo','Ubuntu Mono',monospace;
-      white-space:pre-wrap;
-      overflow:auto;
-      max-height:80vh;
-    }
-
-    .copy-btn {
-      position:absolute; top:10px; right:10px;
-      background: rgba(102, 126, 234, 0.9);
-      color:white; border:none; border-radius:6px;
-      padding:6px 10px; font-weight:800; cursor:pointer;
-    }
-  </style>
+  <link rel="stylesheet" href="{{ asset_url('pasteBin2_view.css') }}">
 </head>
 <body>
   <div class="wrap">
@@ -351,49 +234,7 @@ VIEW_TEMPLATE = r"""
     </div>
   </div>
 
-  <script>
-    function copyPaste(btn) {
-      const node = document.getElementById('paste-content');
-      if (!node) return;
-
-      const clone = node.cloneNode(true);
-      const b = clone.querySelector('button.copy-btn');
-      if (b) b.remove();
-
-      const text = (clone.innerText || clone.textContent || '').trim();
-
-      const show = () => {
-        const old = btn.innerHTML;
-        btn.innerHTML = '✅ Copied!';
-        setTimeout(() => btn.innerHTML = old, 1600);
-      };
-
-      if (navigator.clipboard && window.isSecureContext) {
-        navigator.clipboard.writeText(text).then(show).catch(() => fallback(text, show));
-      } else {
-        fallback(text, show);
-      }
-    }
-
-    function fallback(text, okCb) {
-      const ta = document.createElement('textarea');
-      ta.value = text;
-      ta.setAttribute('readonly', '');
-      ta.style.position = 'fixed';
-      ta.style.left = '-9999px';
-      document.body.appendChild(ta);
-      ta.select();
-      try {
-        const ok = document.execCommand('copy');
-        if (ok) okCb();
-        else alert('Copy failed (browser blocked it).');
-      } catch (e) {
-        alert('Copy failed (browser blocked it).');
-      } finally {
-        document.body.removeChild(ta);
-      }
-    }
-  </script>
+  <script src="{{ asset_url('scripts/pasteBin2.js') }}"></script>
 </body>
 </html>
 """
@@ -0,0 +1,439 @@
+"""Primary change feed and read-replica follower mode.
+
+The primary records every create/delete in an ordered journal
+(pastes/changes.db, SQLite) and serves it at GET /api/changes?since=<seq>,
+plus a consistent starting point at GET /api/snapshot. Sequence numbers come
+from SQLite AUTOINCREMENT, so every worker process shares one sequence. When a
+paste is deleted its earlier create events become tombstones, so deleted
+content is not kept or served. Only the last JOURNAL_RETAIN events are kept;
+a follower whose cursor is older than that re-bootstraps from the snapshot.
+
+A follower (started with PASTE_PRIMARY_URL set) bootstraps from the snapshot,
+then polls the change feed and applies events to its own local pastes.json,
+persisting the resume cursor after each batch. It serves reads locally and
+redirects writes to the primary. Replication lag is reported under
+"replication" in GET /api/metrics.
+
+Two local processes:
+
+    python app.py
+    PASTE_STORAGE_DIR=/tmp/replica PASTE_PORT=5003 \\
+        PASTE_PRIMARY_URL=http://localhost:5002 python app.py
+
+Writers in any number of processes serialize on a StoreLock around the
+pastes.json rewrite and journal append, and the pastes.json rewrite happens
+inside the journal transaction so the two land together. On a follower only
+one process per store runs the tailing thread; the others just serve reads,
+and report the tailer's progress from the state file it keeps next to the
+cursor.
+
+The cross-process locks use fcntl.flock, so they need a POSIX system. Where
+fcntl is missing (Windows) the locks only cover threads in one process: run
+a single worker per store there.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows; locks then only cover one process
+    fcntl = None
+
+# Configuration
+PRIMARY_URL = os.environ.get("PASTE_PRIMARY_URL", "").rstrip("/")
+POLL_INTERVAL = float(os.environ.get("PASTE_REPLICATION_INTERVAL", 1.0))
+JOURNAL_RETAIN = int(os.environ.get("PASTE_JOURNAL_RETAIN", 10000))
+COMPACT_EVERY = 100
+CHANGES_PAGE_SIZE = 500
+HTTP_TIMEOUT = 10
+# a tailer that hasn't reported for this long counts as stopped
+STALE_AFTER = 3 * POLL_INTERVAL + HTTP_TIMEOUT
+
+# endpoints a follower hands off to the primary
+WRITE_ENDPOINTS = {"create_paste", "api_create_paste", "delete_paste"}
+
+
+class StoreLock:
+    """Exclusive lock over the paste store, shared by threads and processes.
+
+    acquire() and release() may run on different threads, which the ASGI app
+    relies on when it hops between executor threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        except OSError:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ChangeJournal:
+    """Ordered log of create/delete events, shared across worker processes."""
+
+    def __init__(self, db_path: str, retain: int = JOURNAL_RETAIN):
+        self.db_path = db_path
+        self.retain = retain
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, "
+                "paste_id TEXT NOT NULL, paste TEXT, ts REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS changes_paste_id ON changes (paste_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    def _connect(self):
+        # one short-lived connection per call: sqlite connections are not thread-safe
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    @staticmethod
+    def _head(conn) -> int:
+        # sqlite_sequence keeps the last seq even after compaction deleted the rows
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _compacted_through(conn) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE name = 'compacted_through'").fetchone()
+        return row[0] if row else 0
+
+    def append(self, event: dict, apply=None) -> int:
+        """Record event and return its seq.
+
+        apply, if given, runs inside the open transaction after the insert
+        (e.g. the pastes.json rewrite): the event is only committed if it
+        succeeds, and is rolled back if it raises.
+        """
+        op = event["op"]
+        paste = event.get("paste")
+        paste_id = paste["id"] if op == "create" else event["id"]
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if op == "delete":
+                # the deleted content must not stay readable through the feed
+                conn.execute(
+                    "UPDATE changes SET op = 'tombstone', paste = NULL "
+                    "WHERE op = 'create' AND paste_id = ?",
+                    (paste_id,),
+                )
+            cur = conn.execute(
+                "INSERT INTO changes (op, paste_id, paste, ts) VALUES (?, ?, ?, ?)",
+                (op, paste_id, json.dumps(paste) if paste is not None else None, time.time()),
+            )
+            seq = cur.lastrowid
+            if seq % COMPACT_EVERY == 0:
+                self._compact(conn, seq)
+            if apply is not None:
+                apply()
+            conn.execute("COMMIT")
+            return seq
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _compact(self, conn, head: int):
+        cutoff = head - self.retain
+        if cutoff <= self._compacted_through(conn):
+            return
+        conn.execute("DELETE FROM changes WHERE seq <= ?", (cutoff,))
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('compacted_through', ?)",
+            (cutoff,),
+        )
+
+    def compact(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._compact(conn, self._head(conn))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def head(self) -> int:
+        conn = self._connect()
+        try:
+            return self._head(conn)
+        finally:
+            conn.close()
+
+    def feed(self, since: int, limit: int = CHANGES_PAGE_SIZE) -> dict:
+        """Events after since, plus head and compaction point, from one read snapshot."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            rows = conn.execute(
+                "SELECT seq, op, paste_id, paste, ts FROM changes "
+                "WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit),
+            ).fetchall()
+            head = self._head(conn)
+            compacted_through = self._compacted_through(conn)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        events = []
+        for seq, op, paste_id, paste, ts in rows:
+            event = {"seq": seq, "op": op, "ts": ts}
+            if op == "create":
+                event["paste"] = json.loads(paste)
+            else:
+                event["id"] = paste_id
+            events.append(event)
+        return {"events": events, "head": head, "compacted_through": compacted_through}
+
+    def read(self, since: int, limit: int = CHANGES_PAGE_SIZE):
+        return self.feed(since, limit)["events"]
+
+    def metrics(self) -> dict:
+        conn = self._connect()
+        try:
+            return {
+                "role": "primary",
+                "head": self._head(conn),
+                "compacted_through": self._compacted_through(conn),
+            }
+        finally:
+            conn.close()
+
+
+def apply_events(pastes, events):
+    """Apply journal events to a paste list, newest first like the primary.
+
+    Not idempotent by itself: the follower only passes events after its cursor.
+    """
+    for event in events:
+        op = event.get("op")
+        if op == "create":
+            pastes.insert(0, event["paste"])
+        elif op == "delete":
+            pastes = [p for p in pastes if p.get("id") != event["id"]]
+        # tombstones: the create was for a paste deleted later in the feed
+    return pastes
+
+
+class Follower:
+    def __init__(self, primary_url: str, cursor_file: str, load_pastes, save_pastes,
+                 interval: float = POLL_INTERVAL):
+        self.primary_url = primary_url
+        self.cursor_file = cursor_file
+        self.load_pastes = load_pastes
+        self.save_pastes = save_pastes
+        self.interval = interval
+
+        self.state_file = cursor_file + ".state"
+
+        self.cursor = self._load_cursor()
+        self.primary_head = None
+        self.synced_at = None
+        self.pending_since = None
+        self.last_event_delay = None
+        self.last_error = None
+        self._thread = None
+        self._owner_fd = None
+
+    def _load_cursor(self):
+        try:
+            with open(self.cursor_file, "r", encoding="utf-8") as f:
+                return int(json.load(f)["cursor"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return None
+
+    def _save_cursor(self, cursor: int):
+        temp_file = self.cursor_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump({"cursor": cursor}, f)
+        os.replace(temp_file, self.cursor_file)
+        self.cursor = cursor
+
+    def _save_state(self):
+        # only the tailing process writes this; every worker reads it for metrics
+        state = {
+            "pid": os.getpid(),
+            "updated_at": time.time(),
+            "primary_head": self.primary_head,
+            "synced_at": self.synced_at,
+            "pending_since": self.pending_since,
+            "last_event_delay": self.last_event_delay,
+            "last_error": self.last_error,
+        }
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _get_json(self, path: str, **params):
+        url = self.primary_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        with urllib.request.urlopen(url, timeout=HTTP_TIMEOUT) as resp:
+            return json.load(resp)
+
+    def bootstrap(self):
+        snapshot = self._get_json("/api/snapshot")
+        self.save_pastes(snapshot["pastes"])
+        self._save_cursor(snapshot["cursor"])
+        self.primary_head = snapshot["cursor"]
+
+    def sync_once(self):
+        if self.cursor is None:
+            self.bootstrap()
+
+        while True:
+            feed = self._get_json("/api/changes", since=self.cursor, limit=CHANGES_PAGE_SIZE)
+            self.primary_head = feed["head"]
+            if self.cursor > feed["head"] or self.cursor < feed.get("compacted_through", 0):
+                # journal was reset, or compacted past us: start over from a snapshot
+                self.bootstrap()
+                continue
+
+            events = [e for e in feed["events"] if e["seq"] > self.cursor]
+            if not events:
+                break
+            self.pending_since = events[0]["ts"]
+            self.save_pastes(apply_events(self.load_pastes(), events))
+            self._save_cursor(events[-1]["seq"])
+            # primary clock vs ours; fine for same-host or NTP-synced nodes
+            self.last_event_delay = max(time.time() - events[-1]["ts"], 0.0)
+            self._save_state()
+
+        self.pending_since = None
+        self.synced_at = time.time()
+        self.last_error = None
+        self._save_state()
+
+    def poll(self):
+        """One sync attempt; a failure is recorded for metrics instead of raised."""
+        try:
+            self.sync_once()
+        except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+            self.last_error = str(e)
+            self._save_state()
+
+    def run(self):
+        while True:
+            self.poll()
+            time.sleep(self.interval)
+
+    def start(self) -> bool:
+        """Start tailing unless another process already does for this store."""
+        if self._thread is not None:
+            return True
+        fd = os.open(self.cursor_file + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+        # held for the life of the process
+        self._owner_fd = fd
+        self._thread = threading.Thread(target=self.run, name="paste-follower", daemon=True)
+        self._thread.start()
+        return True
+
+    @staticmethod
+    def _lag_seconds(state: dict, now: float):
+        pending_since = state.get("pending_since")
+        synced_at = state.get("synced_at")
+        stopped = (
+            state.get("last_error") is not None
+            or now - state.get("updated_at", now) > STALE_AFTER
+        )
+
+        lags = []
+        if pending_since is not None:
+            lags.append(now - pending_since)
+        if stopped:
+            # nothing new has been applied since the last good sync
+            if synced_at is None:
+                return None
+            lags.append(now - synced_at)
+        elif synced_at is not None:
+            lags.append(0.0)
+        return round(max(max(lags), 0.0), 3) if lags else None
+
+    def metrics(self) -> dict:
+        """Replication status as seen through the cursor and state files.
+
+        Read from disk rather than this object, so every worker reports the
+        tailing process's progress, not just the worker that runs it.
+        """
+        now = time.time()
+        cursor = self._load_cursor()
+        state = self._load_state()
+        primary_head = state.get("primary_head")
+        synced_at = state.get("synced_at")
+        last_event_delay = state.get("last_event_delay")
+
+        lag_events = None
+        if cursor is not None and primary_head is not None:
+            lag_events = max(primary_head - cursor, 0)
+        return {
+            "role": "follower",
+            "primary": self.primary_url,
+            # whether this worker tails; tailer_pid says which process does
+            "tailing": self._thread is not None,
+            "tailer_pid": state.get("pid"),
+            "cursor": cursor,
+            "primary_head": primary_head,
+            "lag_events": lag_events,
+            # age of the oldest event seen on the primary but not yet applied,
+            # or at least the time since the last good sync once polling fails
+            "lag_seconds": self._lag_seconds(state, now),
+            # primary commit -> local apply, for the most recently applied event
+            "last_event_delay_seconds": (
+                round(last_event_delay, 3) if last_event_delay is not None else None
+            ),
+            "seconds_since_sync": round(now - synced_at, 3) if synced_at else None,
+            "last_error": state.get("last_error"),
+        }
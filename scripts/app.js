@@ -27,7 +27,7 @@ function copyFromElementRemovingButtons(element, button) {
 if (!icon) return;
 
 const originalSrc = icon.src;
-icon.src = "/static/resources/copy-success.svg";
+icon.src = icon.dataset.successSrc || "/static/resources/copy-success.svg";
 
 setTimeout(() => {
   icon.src = originalSrc;
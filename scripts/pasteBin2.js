@@ -0,0 +1,84 @@
+function copyToClipboard(pasteId, btn) {
+  const node = document.getElementById('content-' + pasteId);
+  if (!node) return;
+
+  const clone = node.cloneNode(true);
+  const b = clone.querySelector('button.copy-btn');
+  if (b) b.remove();
+
+  const text = (clone.innerText || clone.textContent || '').trim();
+
+  const show = () => {
+    const old = btn.innerHTML;
+    btn.innerHTML = '✅ Copied!';
+    setTimeout(() => btn.innerHTML = old, 1600);
+  };
+
+  // HTTPS/localhost works reliably; LAN HTTP often blocks it -> fallback below
+  if (navigator.clipboard && window.isSecureContext) {
+    navigator.clipboard.writeText(text).then(show).catch(() => fallbackCopy(text, show));
+  } else {
+    fallbackCopy(text, show);
+  }
+}
+
+function fallbackCopy(text, okCb) {
+  const ta = document.createElement('textarea');
+  ta.value = text;
+  ta.setAttribute('readonly', '');
+  ta.style.position = 'fixed';
+  ta.style.left = '-9999px';
+  document.body.appendChild(ta);
+  ta.select();
+  try {
+    const ok = document.execCommand('copy');
+    if (ok) okCb();
+    else alert('Copy failed (browser blocked it).');
+  } catch (e) {
+    alert('Copy failed (browser blocked it).');
+  } finally {
+    document.body.removeChild(ta);
+  }
+}
+
+function copyPaste(btn) {
+  const node = document.getElementById('paste-content');
+  if (!node) return;
+
+  const clone = node.cloneNode(true);
+  const b = clone.querySelector('button.copy-btn');
+  if (b) b.remove();
+
+  const text = (clone.innerText || clone.textContent || '').trim();
+
+  const show = () => {
+    const old = btn.innerHTML;
+    btn.innerHTML = '✅ Copied!';
+    setTimeout(() => btn.innerHTML = old, 1600);
+  };
+
+  if (navigator.clipboard && window.isSecureContext) {
+    navigator.clipboard.writeText(text).then(show).catch(() => fallback(text, show));
+  } else {
+    fallback(text, show);
+  }
+}
+
+function fallback(text, okCb) {
+  const ta = document.createElement('textarea');
+  ta.value = text;
+  ta.setAttribute('readonly', '');
+  ta.style.position = 'fixed';
+  ta.style.left = '-9999px';
+  document.body.appendChild(ta);
+  ta.select();
+  try {
+    const ok = document.execCommand('copy');
+    if (ok) okCb();
+    else alert('Copy failed (browser blocked it).');
+  } catch (e) {
+    alert('Copy failed (browser blocked it).');
+  } finally {
+    document.body.removeChild(ta);
+  }
+}
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# modules live at the repo root, next to app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py sets up its store at import; keep that out of the repo's pastes/
+os.environ["PASTE_STORAGE_DIR"] = tempfile.mkdtemp(prefix="pastes-test-")
+os.environ.pop("PASTE_PRIMARY_URL", None)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point app.py (and asgi.py, if loaded) at a fresh, empty store."""
+    pytest.importorskip("flask")
+    import app
+    from admission import TokenBucketStore, WriteAdmission
+    from replication import ChangeJournal, StoreLock
+
+    admission = WriteAdmission(TokenBucketStore(str(tmp_path / "admission.db"), 1.0, 100), depth=64)
+    store_lock = StoreLock(str(tmp_path / ".write.lock"))
+
+    monkeypatch.setattr(app, "PASTE_FILE", str(tmp_path / "pastes.json"))
+    monkeypatch.setattr(app, "journal", ChangeJournal(str(tmp_path / "changes.db")))
+    for module_name in ("app", "asgi"):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            monkeypatch.setattr(module, "admission", admission)
+            monkeypatch.setattr(module, "store_lock", store_lock)
+    return tmp_path
@@ -0,0 +1,222 @@
+import pytest
+
+import admission
+from admission import TokenBucketStore, WriteAdmission, WriteRejected
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def buckets(tmp_path):
+    return TokenBucketStore(str(tmp_path / "admission.db"), rate=1.0, burst=3)
+
+
+def test_take_allows_burst_then_reports_wait(buckets, clock):
+    assert [buckets.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("a") == pytest.approx(1.0)
+
+
+def test_take_refills_over_time(buckets, clock):
+    for _ in range(3):
+        buckets.take("a")
+    clock[0] += 0.5
+    assert buckets.take("a") == pytest.approx(0.5)
+    clock[0] += 1.0
+    assert buckets.take("a") == 0.0
+
+
+def test_buckets_are_per_client_and_shared_across_instances(tmp_path, clock):
+    path = str(tmp_path / "admission.db")
+    first = TokenBucketStore(path, rate=1.0, burst=1)
+    second = TokenBucketStore(path, rate=1.0, burst=1)
+    assert first.take("a") == 0.0
+    assert second.take("a") > 0
+    assert second.take("b") == 0.0
+
+
+def test_rate_limit_rejects_with_retry_after(buckets, clock):
+    gate = WriteAdmission(buckets, depth=10)
+    for _ in range(3):
+        gate.check_rate("a")
+    with pytest.raises(WriteRejected) as exc:
+        gate.check_rate("a")
+    assert exc.value.status == 429
+    assert exc.value.retry_after >= 1
+    assert gate.metrics()["rejected"]["rate_limited"] == 1
+
+
+def test_queue_depth_limit(buckets):
+    gate = WriteAdmission(buckets, depth=2)
+    gate.enter()
+    gate.enter()
+    with pytest.raises(WriteRejected) as exc:
+        gate.enter()
+    assert exc.value.status == 503
+    gate.leave()
+    gate.enter()
+
+    metrics = gate.metrics()
+    assert metrics["write_queue"]["pending"] == 2
+    assert metrics["rejected"]["queue_full"] == 1
+
+
+def test_full_queue_rejects_without_taking_a_token(buckets, clock):
+    gate = WriteAdmission(buckets, depth=1)
+    gate.enter()
+    for _ in range(5):
+        with pytest.raises(WriteRejected):
+            with gate.admitted("a"):
+                pass
+    gate.leave()
+    # the burst of 3 is still intact
+    for _ in range(3):
+        with gate.admitted("a"):
+            pass
+
+
+def test_admitted_releases_slot_on_rate_rejection(buckets, clock):
+    gate = WriteAdmission(buckets, depth=1)
+    for _ in range(3):
+        with gate.admitted("a"):
+            pass
+    with pytest.raises(WriteRejected):
+        with gate.admitted("a"):
+            pass
+    assert gate.metrics()["write_queue"]["pending"] == 0
+
+
+def test_prune_drops_buckets_that_have_been_full_for_a_while(buckets, clock, monkeypatch):
+    monkeypatch.setattr(admission, "BUCKET_IDLE_SECONDS", 100)
+    buckets.take("idle")
+    for _ in range(3):
+        buckets.take("busy")
+
+    # "idle" is back at burst after 1s, "busy" after 3s
+    clock[0] += 102
+    buckets.prune()
+    with buckets._connect() as conn:
+        clients = {row[0] for row in conn.execute("SELECT client FROM buckets")}
+    assert clients == {"busy"}
+
+    # a pruned client starts again from a full bucket
+    assert [buckets.take("idle") for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_take_prunes_periodically(buckets, clock, monkeypatch):
+    monkeypatch.setattr(admission, "BUCKET_IDLE_SECONDS", 10)
+    buckets.take("old")
+    clock[0] += admission.PRUNE_INTERVAL + 20
+    buckets.take("new")
+    with buckets._connect() as conn:
+        clients = {row[0] for row in conn.execute("SELECT client FROM buckets")}
+    assert clients == {"new"}
+
+
+# HTTP contract, against the Flask app on a temporary store
+
+@pytest.fixture
+def limited(store, monkeypatch, tmp_path):
+    """Flask client whose writes allow a burst of 2 and a queue depth of 4."""
+    import app
+
+    gate = WriteAdmission(TokenBucketStore(str(tmp_path / "limited.db"), 0.01, 2), depth=4)
+    monkeypatch.setattr(app, "admission", gate)
+    return app.app.test_client(), gate
+
+
+def test_api_write_burst_gets_429_with_retry_after(limited):
+    client, _ = limited
+    for i in range(2):
+        assert client.post("/api/paste", json={"content": f"ok {i}"}).status_code == 200
+
+    response = client.post("/api/paste", json={"content": "one too many"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "error" in response.get_json()
+
+
+def test_saturated_queue_gets_503_with_retry_after(limited):
+    client, gate = limited
+    for _ in range(gate.depth):
+        gate.enter()
+    try:
+        response = client.post("/api/paste", json={"content": "queued"})
+    finally:
+        for _ in range(gate.depth):
+            gate.leave()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_form_routes_get_status_and_html_not_redirect(limited):
+    client, _ = limited
+    for i in range(2):
+        client.post("/paste", data={"content": f"ok {i}"})
+
+    response = client.post("/paste", data={"content": "one too many"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert response.mimetype == "text/html"
+    assert "Too many writes" in response.get_data(as_text=True)
+
+    response = client.get("/delete/whatever")
+    assert response.status_code == 429
+    assert "Location" not in response.headers
+
+
+def test_reads_bypass_the_limiter(limited):
+    client, gate = limited
+    paste_id = client.post("/api/paste", json={"content": "readable"}).get_json()["id"]
+    client.post("/api/paste", json={"content": "drain"})
+    assert client.post("/api/paste", json={"content": "x"}).status_code == 429
+
+    for _ in range(gate.depth):
+        gate.enter()
+    try:
+        for url in ("/", f"/paste/{paste_id}", f"/raw/{paste_id}", "/api/pastes", "/api/metrics"):
+            assert client.get(url).status_code == 200, url
+    finally:
+        for _ in range(gate.depth):
+            gate.leave()
+
+
+def test_metrics_expose_queue_and_rejections(limited):
+    client, gate = limited
+    for i in range(3):
+        client.post("/api/paste", json={"content": f"p {i}"})
+    gate.enter()
+    try:
+        metrics = client.get("/api/metrics").get_json()
+    finally:
+        gate.leave()
+
+    assert metrics["write_queue"]["pending"] == 1
+    assert metrics["write_queue"]["max_depth"] == 4
+    assert metrics["rejected"] == {"rate_limited": 1, "queue_full": 0}
+
+
+def test_asgi_form_rejection_keeps_status(limited, monkeypatch):
+    pytest.importorskip("quart")
+    import asyncio
+    import asgi
+
+    _, gate = limited
+    monkeypatch.setattr(asgi, "admission", gate)
+    monkeypatch.setattr(asgi, "_write_lock", asyncio.Lock())
+
+    async def go():
+        client = asgi.app.test_client()
+        for i in range(2):
+            await client.post("/paste", form={"content": f"ok {i}"})
+        form = await client.post("/paste", form={"content": "no"})
+        api = await client.post("/api/paste", json={"content": "no"})
+        return form, api
+
+    form, api = asyncio.run(go())
+    assert form.status_code == 429 and "Retry-After" in form.headers
+    assert api.status_code == 429 and "Retry-After" in api.headers
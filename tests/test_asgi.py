@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("quart")
+
+import asgi
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    # a fresh lock per test: each test runs in its own event loop
+    monkeypatch.setattr(asgi, "_write_lock", asyncio.Lock())
+    return asgi.app.test_client()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def create(client, content, **extra):
+    async def go():
+        response = await client.post("/api/paste", json=dict(extra, content=content))
+        return response.status_code, await response.get_json()
+    return run(go())
+
+
+def test_index_lists_pastes(client):
+    create(client, "hello index", title="Greeting")
+
+    async def go():
+        response = await client.get("/")
+        return response.status_code, await response.get_data(as_text=True)
+    status, body = run(go())
+    assert status == 200
+    assert "Greeting" in body
+
+
+def test_api_paste_and_view(client):
+    status, data = create(client, "print('hi')", title="t")
+    assert status == 200
+    assert data["paste"]["content"] == "print('hi')"
+
+    async def go():
+        found = await client.get(f"/paste/{data['id']}")
+        missing = await client.get("/paste/nope")
+        return found.status_code, await found.get_data(as_text=True), missing.status_code
+    status, body, missing = run(go())
+    assert status == 200
+    assert data["id"] in body
+    assert missing == 404
+
+
+def test_api_paste_rejects_empty(client):
+    status, data = create(client, "   ")
+    assert status == 400
+    assert "error" in data
+
+
+def test_raw_is_streamed_in_chunks(client, monkeypatch):
+    monkeypatch.setattr(asgi, "RAW_CHUNK_SIZE", 10)
+    content = "0123456789" * 25 + "é"
+    _, data = create(client, content)
+
+    async def go():
+        response = await client.get(f"/raw/{data['id']}")
+        return response, await response.get_data(as_text=True)
+    response, body = run(go())
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert body == content
+
+    async def chunks():
+        return [c async for c in asgi.stream_text(content)]
+    parts = run(chunks())
+    assert len(parts) == 26
+    assert b"".join(parts) == content.encode("utf-8")
+
+
+def test_scripts_served_from_any_working_directory(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def go():
+        response = await client.get("/scripts/app.js")
+        return response.status_code, await response.get_data(as_text=True)
+    status, body = run(go())
+    assert status == 200
+    assert "copyToClipboard" in body
+
+
+def test_concurrent_writes_are_not_lost(client, store, monkeypatch):
+    import app
+
+    load_pastes = app.load_pastes
+
+    def slow_load_pastes():
+        # widen the load -> save window so unserialized writers would collide
+        pastes = load_pastes()
+        time.sleep(0.005)
+        return pastes
+
+    monkeypatch.setattr(app, "load_pastes", slow_load_pastes)
+    count = 30
+
+    async def go():
+        responses = await asyncio.gather(
+            *(client.post("/api/paste", json={"content": f"paste {i}"}) for i in range(count))
+        )
+        return [r.status_code for r in responses]
+    assert run(go()) == [200] * count
+
+    with open(store / "pastes.json", encoding="utf-8") as f:
+        stored = json.load(f)
+    assert sorted(p["content"] for p in stored) == sorted(f"paste {i}" for i in range(count))
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+
+import assets
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    static = tmp_path / "static"
+    scripts = tmp_path / "scripts"
+    (static / "resources").mkdir(parents=True)
+    scripts.mkdir()
+    (static / "style.css").write_text("body { color: red; }")
+    (static / "resources" / "copy.svg").write_text("<svg></svg>")
+    (scripts / "app.js").write_text("console.log(1);")
+
+    dist = static / "dist"
+    monkeypatch.setattr(assets, "STATIC_DIR", str(static))
+    monkeypatch.setattr(assets, "SCRIPTS_DIR", str(scripts))
+    monkeypatch.setattr(assets, "ASSET_DIR", str(dist))
+    monkeypatch.setattr(assets, "MANIFEST_FILE", str(dist / "manifest.json"))
+    return tmp_path
+
+
+def fake_url_for(endpoint, filename):
+    return f"/{endpoint}/{filename}"
+
+
+def test_build_fingerprints_and_compresses(tree):
+    manifest = assets.build()
+
+    assert set(manifest) == {"style.css", "resources/copy.svg", "scripts/app.js"}
+    assert manifest["style.css"].startswith("style.") and manifest["style.css"].endswith(".css")
+    for hashed in manifest.values():
+        assert os.path.isfile(os.path.join(assets.ASSET_DIR, hashed))
+        assert os.path.isfile(os.path.join(assets.ASSET_DIR, hashed + ".gz"))
+    assert assets.load_manifest() == manifest
+
+
+def test_rebuild_keeps_old_files_until_clean(tree):
+    old = assets.build()["style.css"]
+    (tree / "static" / "style.css").write_text("body { color: blue; }")
+    new = assets.build()["style.css"]
+
+    assert new != old
+    assert os.path.isfile(os.path.join(assets.ASSET_DIR, old))
+    assert assets.load_manifest()["style.css"] == new
+
+    assert assets.clean() > 0
+    assert not os.path.exists(os.path.join(assets.ASSET_DIR, old))
+    assert not os.path.exists(os.path.join(assets.ASSET_DIR, old + ".gz"))
+    assert os.path.isfile(os.path.join(assets.ASSET_DIR, new))
+    assert os.path.isfile(assets.MANIFEST_FILE)
+
+
+def test_build_skips_only_its_own_output_dir(tree):
+    (tree / "static" / "dist-old").mkdir()
+    (tree / "static" / "dist-old" / "legacy.css").write_text("p {}")
+    assets.build()
+    manifest = assets.build()
+
+    assert "dist-old/legacy.css" in manifest
+    assert not any(name.startswith("dist/") for name in manifest)
+
+
+def test_resolve_asset_url():
+    manifest = {"style.css": "style.abc.css"}
+    assert assets.resolve_asset_url(manifest, "style.css", fake_url_for) == "/assets/style.abc.css"
+    assert assets.resolve_asset_url({}, "style.css", fake_url_for) == "/static/style.css"
+    assert assets.resolve_asset_url({}, "scripts/app.js", fake_url_for) == "/scripts/app.js"
+
+
+@pytest.fixture
+def built(tree):
+    hashed = assets.build()["style.css"]
+    open(os.path.join(assets.ASSET_DIR, hashed + ".br"), "wb").close()
+    return hashed
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.1, br;q=0", "gzip"),
+        ("", None),
+    ],
+)
+def test_negotiate_encoding(built, header, expected):
+    served, encoding = assets.negotiate_encoding(built, header)
+    assert encoding == expected
+    assert served == built + {"br": ".br", "gzip": ".gz", None: ""}[expected]
+
+
+def test_negotiate_encoding_skips_missing_variant(tree):
+    hashed = assets.build()["style.css"]
+    assert assets.negotiate_encoding(hashed, "br, gzip") == (hashed + ".gz", "gzip")
+
+
+@pytest.fixture
+def asset_client(tree, monkeypatch):
+    flask_app = pytest.importorskip("app")
+    manifest = assets.build()
+    monkeypatch.setattr(flask_app, "ASSET_DIR", assets.ASSET_DIR)
+    monkeypatch.setattr(flask_app, "asset_manifest", manifest)
+    return flask_app.app.test_client(), manifest
+
+
+def test_assets_route_headers(asset_client):
+    client, manifest = asset_client
+    url = "/assets/" + manifest["style.css"]
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == assets.IMMUTABLE_CACHE_CONTROL
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.mimetype == "text/css"
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True) == "body { color: red; }"
+
+
+@pytest.mark.parametrize("name", ["manifest.json", "style.css", "nope.abc123.css"])
+def test_assets_route_serves_only_manifest_values(asset_client, name):
+    client, manifest = asset_client
+    assert client.get("/assets/" + name).status_code == 404
+    assert client.get("/assets/" + manifest["style.css"] + ".gz").status_code == 404
@@ -0,0 +1,272 @@
+import pytest
+
+import replication
+from replication import ChangeJournal, Follower, apply_events
+
+
+def paste(paste_id, content="x", created_at="2025-01-01 00:00:00"):
+    return {"id": paste_id, "title": None, "content": content, "language": None,
+            "created_at": created_at, "size": len(content)}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return ChangeJournal(str(tmp_path / "changes.db"))
+
+
+def test_sequence_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "changes.db")
+    first, second = ChangeJournal(path), ChangeJournal(path)
+    assert first.append({"op": "create", "paste": paste("a")}) == 1
+    assert second.append({"op": "create", "paste": paste("b")}) == 2
+    assert first.append({"op": "delete", "id": "a"}) == 3
+    assert [e["seq"] for e in second.read(0)] == [1, 2, 3]
+    assert first.head() == second.head() == 3
+
+
+def test_read_pages_after_cursor(journal):
+    for i in range(5):
+        journal.append({"op": "create", "paste": paste(f"p{i}")})
+    assert [e["seq"] for e in journal.read(2, limit=2)] == [3, 4]
+    feed = journal.feed(5)
+    assert feed["events"] == [] and feed["head"] == 5
+
+
+def test_delete_tombstones_earlier_creates(journal):
+    journal.append({"op": "create", "paste": paste("a", "secret")})
+    journal.append({"op": "create", "paste": paste("a", "secret")})
+    journal.append({"op": "create", "paste": paste("b", "keep")})
+    journal.append({"op": "delete", "id": "a"})
+
+    events = journal.read(0)
+    assert [e["op"] for e in events] == ["tombstone", "tombstone", "create", "delete"]
+    assert "secret" not in repr(events)
+    assert events[2]["paste"]["content"] == "keep"
+
+
+def test_compaction_drops_old_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(replication, "COMPACT_EVERY", 5)
+    journal = ChangeJournal(str(tmp_path / "changes.db"), retain=3)
+    for i in range(10):
+        journal.append({"op": "create", "paste": paste(f"p{i}")})
+
+    feed = journal.feed(0)
+    assert feed["compacted_through"] == 7
+    assert [e["seq"] for e in feed["events"]] == [8, 9, 10]
+    assert feed["head"] == 10
+
+
+def test_append_rolls_back_when_apply_fails(journal):
+    def failing_save():
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        journal.append({"op": "create", "paste": paste("a")}, apply=failing_save)
+    assert journal.head() == 0
+    assert journal.read(0) == []
+
+    applied = []
+    assert journal.append({"op": "create", "paste": paste("b")}, apply=lambda: applied.append(1)) == 1
+    assert applied == [1]
+
+
+def test_apply_events_keeps_identical_pastes():
+    same = paste("a")
+    events = [
+        {"seq": 1, "op": "create", "paste": same},
+        {"seq": 2, "op": "create", "paste": dict(same)},
+        {"seq": 3, "op": "tombstone", "id": "gone"},
+        {"seq": 4, "op": "create", "paste": paste("b")},
+    ]
+    assert [p["id"] for p in apply_events([], events)] == ["b", "a", "a"]
+
+
+def test_apply_events_delete_removes_all_with_id():
+    pastes = [paste("a"), paste("b"), paste("a")]
+    assert apply_events(pastes, [{"seq": 1, "op": "delete", "id": "a"}]) == [paste("b")]
+
+
+class FakePrimary:
+    def __init__(self, journal, pastes):
+        self.journal = journal
+        self.pastes = pastes
+
+    def get_json(self, path, **params):
+        if path == "/api/snapshot":
+            return {"cursor": self.journal.head(), "pastes": list(self.pastes)}
+        return self.journal.feed(params["since"], params["limit"])
+
+
+@pytest.fixture
+def follower(tmp_path, journal):
+    store = {"pastes": []}
+    follower = Follower(
+        "http://primary",
+        str(tmp_path / "cursor.json"),
+        load_pastes=lambda: list(store["pastes"]),
+        save_pastes=lambda pastes: store.update(pastes=pastes),
+    )
+    follower.store = store
+    follower.primary = FakePrimary(journal, [])
+    follower._get_json = follower.primary.get_json
+    return follower
+
+
+def test_follower_bootstraps_then_tails(follower, journal):
+    follower.primary.pastes = [paste("seed")]
+    follower.sync_once()
+    assert follower.cursor == 0
+    assert [p["id"] for p in follower.store["pastes"]] == ["seed"]
+
+    journal.append({"op": "create", "paste": paste("a")})
+    journal.append({"op": "delete", "id": "seed"})
+    follower.sync_once()
+    assert follower.cursor == 2
+    assert [p["id"] for p in follower.store["pastes"]] == ["a"]
+    assert follower.metrics()["lag_events"] == 0
+    assert follower.metrics()["lag_seconds"] == 0.0
+
+
+def test_follower_resumes_from_saved_cursor(follower, tmp_path, journal):
+    follower.sync_once()
+    journal.append({"op": "create", "paste": paste("a")})
+    follower.sync_once()
+
+    restarted = Follower("http://primary", follower.cursor_file, None, None)
+    assert restarted.cursor == 1
+
+
+def test_follower_resnapshots_when_primary_reset(follower, tmp_path):
+    follower.sync_once()
+    follower._save_cursor(50)
+
+    follower.primary.journal = ChangeJournal(str(tmp_path / "fresh.db"))
+    follower.primary.pastes = [paste("after-reset")]
+    follower.sync_once()
+    assert follower.cursor == 0
+    assert [p["id"] for p in follower.store["pastes"]] == ["after-reset"]
+
+
+def test_follower_resnapshots_when_compacted_past_cursor(follower, journal, monkeypatch):
+    monkeypatch.setattr(replication, "COMPACT_EVERY", 1)
+    journal.retain = 1
+    follower.sync_once()
+
+    for i in range(3):
+        journal.append({"op": "create", "paste": paste(f"p{i}")})
+    follower.primary.pastes = [paste("p2"), paste("p1"), paste("p0")]
+    follower.sync_once()
+    assert follower.cursor == 3
+    assert [p["id"] for p in follower.store["pastes"]] == ["p2", "p1", "p0"]
+
+
+def test_only_one_follower_tails_a_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Follower, "run", lambda self: None)
+    cursor_file = str(tmp_path / "cursor.json")
+    first = Follower("http://primary", cursor_file, None, None)
+    second = Follower("http://primary", cursor_file, None, None)
+    assert first.start() is True
+    assert second.start() is False
+    assert second.metrics()["tailing"] is False
+
+
+def test_follower_metrics_are_shared_through_the_state_file(follower, journal):
+    follower.sync_once()
+    journal.append({"op": "create", "paste": paste("a")})
+    journal.append({"op": "create", "paste": paste("b")})
+    follower.sync_once()
+
+    # another worker on the same store that never tailed
+    other = Follower("http://primary", follower.cursor_file, None, None)
+    journal.append({"op": "create", "paste": paste("c")})
+    follower.primary_head = journal.head()
+    follower._save_state()
+
+    mine, theirs = follower.metrics(), other.metrics()
+    for key in ("cursor", "primary_head", "lag_events", "seconds_since_sync", "tailer_pid"):
+        assert theirs[key] == mine[key], key
+    assert theirs["cursor"] == 2 and theirs["lag_events"] == 1
+
+
+def test_failed_polls_count_as_lag(follower, journal, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(replication.time, "time", lambda: now[0])
+    follower.sync_once()
+    assert follower.metrics()["lag_seconds"] == 0.0
+
+    def unreachable(path, **params):
+        raise replication.urllib.error.URLError("connection refused")
+
+    follower._get_json = unreachable
+    now[0] += 30
+    follower.poll()
+
+    metrics = follower.metrics()
+    assert metrics["last_error"] is not None
+    assert metrics["lag_seconds"] == 30.0
+    assert metrics["seconds_since_sync"] == 30.0
+
+    # recovers once the primary answers again
+    follower._get_json = follower.primary.get_json
+    follower.poll()
+    assert follower.metrics()["lag_seconds"] == 0.0
+    assert follower.metrics()["last_error"] is None
+
+
+def test_silent_tailer_counts_as_lag(follower, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(replication.time, "time", lambda: now[0])
+    follower.sync_once()
+
+    # tailing process died: no error recorded, the state file just stops changing
+    now[0] += replication.STALE_AFTER + 5
+    assert follower.metrics()["lag_seconds"] == replication.STALE_AFTER + 5
+
+
+def test_follower_without_sync_reports_no_lag(follower):
+    follower._get_json = lambda path, **params: (_ for _ in ()).throw(OSError("down"))
+    follower.poll()
+    metrics = follower.metrics()
+    assert metrics["lag_seconds"] is None
+    assert metrics["last_error"] == "down"
+
+
+def test_failed_save_leaves_journal_and_pastes_unchanged(store, monkeypatch):
+    import app
+
+    app.add_paste(paste("kept"))
+
+    def broken_save(pastes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(app, "save_pastes", broken_save)
+    with pytest.raises(OSError):
+        app.add_paste(paste("lost"))
+    assert app.journal.head() == 1
+    assert [p["id"] for p in app.load_pastes()] == ["kept"]
+
+
+def test_failed_journal_commit_restores_pastes(store, monkeypatch):
+    import app
+
+    app.add_paste(paste("kept"))
+
+    def append_then_fail(event, apply=None):
+        apply()
+        raise replication.sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(app.journal, "append", append_then_fail)
+    with pytest.raises(replication.sqlite3.OperationalError):
+        app.remove_paste("kept")
+    assert [p["id"] for p in app.load_pastes()] == ["kept"]
+
+
+def test_locks_degrade_without_fcntl(tmp_path, monkeypatch):
+    monkeypatch.setattr(replication, "fcntl", None)
+    monkeypatch.setattr(Follower, "run", lambda self: None)
+
+    lock = replication.StoreLock(str(tmp_path / ".write.lock"))
+    with lock:
+        assert lock._thread_lock.locked()
+    assert not lock._thread_lock.locked()
+    assert Follower("http://primary", str(tmp_path / "cursor.json"), None, None).start() is True